@@ -3,8 +3,10 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent / "scripts"))
 
 from graph_email import EmailService, _token_cache, get_email_service
-from datetime import datetime, timedelta
 from unittest.mock import MagicMock, patch
+import io
+import json
+import time
 import pytest
 
 
@@ -23,8 +25,11 @@ def _mock_response(status_code, json_data=None, headers=None):
     """Build a MagicMock HTTP response."""
     resp = MagicMock()
     resp.status_code = status_code
+    resp.ok = status_code < 400
     if json_data is not None:
         resp.json.return_value = json_data
+        resp.content = json.dumps(json_data).encode()
+        resp.raw = io.BytesIO(resp.content)  # for the ijson streaming path
     resp.headers = headers or {}
     return resp
 
@@ -37,7 +42,7 @@ def test_token_cache_valid():
     """Cached token is returned without calling session.post."""
     svc = _make_svc()
     _token_cache.access_token = 'cached_tok'
-    _token_cache.expires_at = datetime.now() + timedelta(hours=1)
+    _token_cache.expires_at_monotonic = time.monotonic() + 3600
     token = svc._get_access_token()
     assert token == 'cached_tok'
     svc.session.post.assert_not_called()
@@ -51,7 +56,7 @@ def test_token_refreshed_when_expired():
     )
     # Clear the cache
     _token_cache.access_token = None
-    _token_cache.expires_at = None
+    _token_cache.expires_at_monotonic = 0.0
     token = svc._get_access_token()
     assert token == 'newtoken'
     svc.session.post.assert_called_once()
@@ -95,17 +100,16 @@ def test_send_email_failure():
 
 
 def test_mark_as_unread():
-    """mark_as_unread sends PATCH with isRead:False and returns True on 200."""
+    """mark_as_unread sends PATCH with isRead:false and returns True on 200."""
     svc = _make_svc()
     svc._get_access_token = MagicMock(return_value='tok')
     svc.session.patch.return_value = _mock_response(200)
     result = svc.mark_as_unread('id123')
     assert result is True
     svc.session.patch.assert_called_once()
-    # Verify payload contains isRead: False
-    call_kwargs = svc.session.patch.call_args
-    assert call_kwargs.kwargs.get('json') == {'isRead': False} or \
-           (call_kwargs.args and call_kwargs.args[-1] == {'isRead': False})
+    # Verify the pre-serialized payload contains isRead: false
+    body = svc.session.patch.call_args.kwargs.get('data')
+    assert json.loads(body) == {'isRead': False}
 
 
 def test_list_folders():
@@ -121,6 +125,48 @@ def test_list_folders():
     svc.session.get.assert_called_once()
 
 
+def test_get_email_failure_not_cached():
+    """A failed get_email is retried on the next call; only successes are cached."""
+    svc = _make_svc()
+    svc._get_access_token = MagicMock(return_value='tok')
+    svc.session.get.side_effect = [
+        _mock_response(503),
+        _mock_response(200, {'id': 'id123', 'subject': 'hello'}),
+    ]
+    assert svc.get_email('id123') is None
+    assert svc.get_email('id123') == {'id': 'id123', 'subject': 'hello'}
+    assert svc.session.get.call_count == 2
+    # Third call is served from the cache
+    assert svc.get_email('id123') == {'id': 'id123', 'subject': 'hello'}
+    assert svc.session.get.call_count == 2
+
+
+def test_get_email_malformed_body_returns_none():
+    """A 200 with an undecodable body returns None instead of raising."""
+    svc = _make_svc()
+    svc._get_access_token = MagicMock(return_value='tok')
+    resp = _mock_response(200)
+    resp.content = b'not json {'
+    svc.session.get.return_value = resp
+    assert svc.get_email('id-bad-body') is None
+
+
+def test_list_folders_etag_revalidation():
+    """Second list_folders sends If-None-Match and serves the cached list on 304."""
+    svc = _make_svc()
+    svc._get_access_token = MagicMock(return_value='tok')
+    resp1 = _mock_response(
+        200, {'value': [{'displayName': 'Inbox'}]}, headers={'ETag': 'W/"abc"'}
+    )
+    resp2 = _mock_response(304)
+    svc.session.get.side_effect = [resp1, resp2]
+    first = svc.list_folders()
+    second = svc.list_folders()
+    assert first == second == [{'displayName': 'Inbox'}]
+    sent_headers = svc.session.get.call_args.kwargs['headers']
+    assert sent_headers['If-None-Match'] == 'W/"abc"'
+
+
 def test_pagination_follows_nextlink():
     """_paginate generator follows @odata.nextLink across two pages."""
     svc = _make_svc()
@@ -135,18 +181,76 @@ def test_pagination_follows_nextlink():
     assert svc.session.get.call_count == 2
 
 
-def test_rate_limit_retry():
-    """list_emails retries after 429 Retry-After and returns the second response."""
+def test_pagination_malformed_page_degrades():
+    """A page with an undecodable body logs and ends pagination, no raise."""
     svc = _make_svc()
     svc._get_access_token = MagicMock(return_value='tok')
-    resp429 = _mock_response(429, headers={'Retry-After': '1'})
-    resp200 = _mock_response(200, {'value': []})
-    svc.session.get.side_effect = [resp429, resp200]
-    with patch('graph_email.time.sleep') as mock_sleep:
-        emails = svc.list_emails()
-        assert emails == []
-        assert svc.session.get.call_count == 2
-        mock_sleep.assert_called_once_with(1)
+    resp = _mock_response(200)
+    resp.content = b'not json {'
+    resp.raw = io.BytesIO(resp.content)
+    svc.session.get.return_value = resp
+    assert list(svc._paginate('http://initial')) == []
+
+
+def test_session_retry_config():
+    """_create_session mounts an adapter that retries 429/503 with backoff."""
+    from graph_email import _create_session
+    session = _create_session()
+    retry = session.get_adapter('https://graph.microsoft.com').max_retries
+    assert retry.total == 5
+    assert 429 in retry.status_forcelist
+    assert 503 in retry.status_forcelist
+    assert retry.respect_retry_after_header
+
+
+def test_mark_as_read_batch():
+    """mark_as_read_batch issues one $batch POST and counts successful sub-responses."""
+    svc = _make_svc()
+    svc._get_access_token = MagicMock(return_value='tok')
+    svc.session.post.return_value = _mock_response(
+        200, {'responses': [{'id': '0', 'status': 200}, {'id': '1', 'status': 404}]}
+    )
+    count = svc.mark_as_read_batch(['id1', 'id2'])
+    assert count == 1
+    svc.session.post.assert_called_once()
+    payload = svc.session.post.call_args.kwargs['json']
+    assert len(payload['requests']) == 2
+    assert payload['requests'][0]['method'] == 'PATCH'
+
+
+def test_sweep_inbox_batch():
+    """sweep_inbox_batch folds mark-read PATCHes and move-to-trash POSTs into one $batch."""
+    svc = _make_svc()
+    svc._get_access_token = MagicMock(return_value='tok')
+    svc.session.post.return_value = _mock_response(
+        200, {'responses': [
+            {'id': 'r0', 'status': 200},
+            {'id': 'r1', 'status': 404},
+            {'id': 'd2', 'status': 201},
+        ]}
+    )
+    counts = svc.sweep_inbox_batch(read_ids=['a', 'b'], delete_ids=['c'])
+    assert counts == {'read': 1, 'deleted': 1}
+    svc.session.post.assert_called_once()
+    payload = svc.session.post.call_args.kwargs['json']
+    assert [r['id'] for r in payload['requests']] == ['r0', 'r1', 'd2']
+    assert [r['method'] for r in payload['requests']] == ['PATCH', 'PATCH', 'POST']
+    assert payload['requests'][2]['url'] == '/me/messages/c/move'
+    assert payload['requests'][2]['body'] == {'destinationId': 'deleteditems'}
+
+
+def test_delete_emails_batched():
+    """delete_emails folds all IDs into $batch calls and counts 204 sub-responses."""
+    svc = _make_svc()
+    svc._get_access_token = MagicMock(return_value='tok')
+    svc.session.post.return_value = _mock_response(
+        200, {'responses': [{'id': '0', 'status': 204}, {'id': '1', 'status': 204}, {'id': '2', 'status': 404}]}
+    )
+    deleted = svc.delete_emails(['a', 'b', 'c'])
+    assert deleted == 2
+    svc.session.post.assert_called_once()
+    payload = svc.session.post.call_args.kwargs['json']
+    assert all(r['method'] == 'DELETE' for r in payload['requests'])
 
 
 def test_delete_email_success():